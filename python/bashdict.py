@@ -2,28 +2,81 @@
 Reads environment variables from a bash script file and returns them as a dictionary
 """
 import os
+import re
+
+# Matches `export KEY[=VALUE]` and `unset KEY ...` lines; anything else (comments, blank lines) is skipped.
+# As with the old line-by-line parser, the key is the first word after the keyword, text between the key
+# and the first "=" is ignored, and only the first name of an unset is used.
+_PAT = re.compile(
+    r'^[ \t]*(?:export[ \t]+([^\s=]+)[^\n=]*(?:=(.*?))?|unset[ \t]+(\S+)[^\n]*?)[ \t\r]*$',
+    re.M,
+)
+
+# Parsed results keyed on (path, mtime, size) so unchanged scripts are not re-read
+_CACHE: dict[tuple, dict] = {}
+CACHE_MAX = 128
+
+
+def cached_by_stat(cache, bash_script, build):
+    """
+    Returns build(path) for a script, memoized in cache on the script's (path, mtime, size)
+
+    The file is stat'ed once per call; the cache holds at most CACHE_MAX entries and evicts the oldest first.
+    The cached object itself is returned, so callers must copy it before handing it out.
+    """
+    path = os.path.abspath(os.path.expanduser(bash_script))
+    st = os.stat(path)
+    cache_key = (path, st.st_mtime_ns, st.st_size)
+    result = cache.get(cache_key)
+    if result is None:
+        result = build(path)
+        if len(cache) >= CACHE_MAX:
+            del cache[next(iter(cache))]
+        cache[cache_key] = result
+    return result
+
 
 def bash_to_dict(bash_script):
     """
     Converts a bash script file to a config file
     
     There is a special key called "unset" that contains a list of environment variables that were unset in the bash script
+
+    Later lines win: a variable exported after it is unset is only in the config, and one unset after it is
+    exported is only in "unset", matching what sourcing the script would leave in the environment
+
+    Values wrapped in matching single or double quotes are returned without the quotes
     """
+    return _copy_config(cached_by_stat(_CACHE, bash_script, parse_bash))
+
+
+def parse_bash(path):
+    """Parses a bash script file like bash_to_dict, without caching"""
     config = {}
     unset = []
-    expanded = os.path.expanduser(bash_script)
-    with open(expanded, "r") as bash_file:
-        for line in bash_file:
-            line = line.strip()
-            if line.startswith("#"):
-                continue
-            elif line.startswith("export"):
-                parts = line.split("=")
-                key = parts[0].split()[1]
-                value = "=".join(parts[1:])
-                config[key] = value
-            elif line.startswith("unset"):
-                key = line.split()[1]
-                unset.append(key)
+    with open(path, "r") as bash_file:
+        text = bash_file.read()
+    for m in _PAT.finditer(text):
+        key, value, unset_key = m.groups()
+        if key:
+            if value is None:
+                value = ''
+            # Drop one pair of matching surrounding quotes so consumers get the bare value
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+                value = value[1:-1]
+            config[key] = value
+            if key in unset:
+                unset.remove(key)
+        else:
+            config.pop(unset_key, None)
+            if unset_key not in unset:
+                unset.append(unset_key)
     config['unset'] = unset
     return config
+
+
+def _copy_config(config):
+    """Returns a copy of a cached config that callers can mutate freely"""
+    result = config.copy()
+    result['unset'] = list(config['unset'])
+    return result
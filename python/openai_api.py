@@ -7,10 +7,25 @@
 """
 
 from abc import ABC, abstractmethod
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 import json
 import requests
 import openai
 import os
+from openai_util import CONFIG_MAPPING
+
+# orjson is much faster at encoding/decoding large embedding payloads; fall back to json if it is not installed
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+_MISSING = object()
 
 def openai_params_from_config(params, config):
     """Initialize or update dictioary of OpenAI settings with values from config"""
@@ -23,16 +38,10 @@ def openai_params_from_config(params, config):
             'organization': None,
         }
     if config:
-        if 'OPENAI_API_KEY' in config:
-            params['api_key'] = config['OPENAI_API_KEY']
-        if 'OPENAI_API_BASE' in config:
-            params['api_base'] = config['OPENAI_API_BASE']
-        if 'OPENAI_API_TYPE' in config:
-            params['api_type'] = config['OPENAI_API_TYPE']
-        if 'OPENAI_API_VERSION' in config:
-            params['api_version'] = config['OPENAI_API_VERSION']
-        if 'OPENAI_ORGANIZATION' in config:
-            params['organization'] = config['OPENAI_ORGANIZATION']
+        for config_key, param_key in CONFIG_MAPPING:
+            value = config.get(config_key, _MISSING)
+            if value is not _MISSING:
+                params[param_key] = value
     return params
 
 
@@ -44,22 +53,32 @@ class APIEndpoint(ABC):
     """
 
     @abstractmethod
-    def get_config(self, text: str) -> dict[str, str]:
+    def get_config(self) -> dict[str, str]:
         """Returns the configuration for the API."""
         raise NotImplementedError
 
-    @abstractmethod
-    def get_response(self, response_json: dict[str, str]) -> dict[str, str]:
-        """Returns the response from the API."""
-        raise NotImplementedError
-
 
 class RESTAPIEndpoint(APIEndpoint):
     """
     Base class for OpenAI API endpoints that use the REST API.
+
+    A single requests.Session is kept per endpoint so connections are reused across calls.
     """
+    def __init__(self):
+        self._session = requests.Session()
+
+    def close(self) -> None:
+        """Closes the session and releases its pooled connections."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     @abstractmethod
-    def get_headers(self) -> dict[str, str]:
+    def get_headers(self) -> Mapping[str, str]:
         """Returns the headers for the API."""
         raise NotImplementedError
 
@@ -89,44 +108,53 @@ class RESTAPIEndpoint(APIEndpoint):
         raise NotImplementedError
 
 
-    def get_embedding(self, text: str) -> list[float]:
-        request = self.get_request(text)
+    def _post(self, url: str, request: dict[str, str]) -> dict:
+        """Posts a request body on the shared session and returns the decoded JSON response."""
         headers = self.get_headers()
-        url = self.get_url()
-
-        with requests.Session() as session:
-            try:
-                response = session.post(url, json=request, headers=headers, verify=False)
-                response.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                print(f"Request failed: {e}")
-                print(f"Request: {request}")
-                print(f"Headers: {headers}")
-                print(f"URL: {url}")
-                print(f"Response: {response.text}")
-                raise e
-            response_json = response.json()
-            return response_json["data"][0]["embedding"]
+        try:
+            response = self._session.post(url, data=_json_dumps(request), headers=headers, verify=False)
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            print(f"Request failed: {e}")
+            print(f"Request: {request}")
+            print(f"Headers: {headers}")
+            print(f"URL: {url}")
+            print(f"Response: {response.text}")
+            raise e
+        return _json_loads(response.content)
+
+
+    def get_embedding(self, text: str) -> list[float]:
+        response_json = self._post(self.get_embedding_url(), self.get_embedding_request(text))
+        return response_json["data"][0]["embedding"]
+
+
+    def get_embeddings_batch(
+        self,
+        texts: list[str],
+        batch_size: int = 256,
+        max_workers: int = 4,
+    ) -> list[list[float]]:
+        """
+        Returns one embedding per text, sending up to batch_size texts per request.
+
+        Batches are posted concurrently on the shared session; results are returned in input order.
+        """
+        url = self.get_embedding_url()
+        chunks = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+
+        def embed_chunk(chunk: list[str]) -> list[list[float]]:
+            response_json = self._post(url, self.get_embedding_request(chunk))
+            data = sorted(response_json["data"], key=lambda d: d["index"])
+            return [d["embedding"] for d in data]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return [embedding for chunk in executor.map(embed_chunk, chunks) for embedding in chunk]
 
 
     def get_completions(self, text: str) -> list[str]:
-        request = self.get_request(text)
-        headers = self.get_headers()
-        url = self.get_url()
-
-        with requests.Session() as session:
-            try:
-                response = session.post(url, json=request, headers=headers, verify=False)
-                response.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                print(f"Request failed: {e}")
-                print(f"Request: {request}")
-                print(f"Headers: {headers}")
-                print(f"URL: {url}")
-                print(f"Response: {response.text}")
-                raise e
-            response_json = response.json()
-            return response_json["data"][0]["completions"]
+        response_json = self._post(self.get_completion_url(), self.get_completion_request(text))
+        return [choice["text"] for choice in response_json["choices"]]
 
 
 class OpenAIRESTEndpoint(RESTAPIEndpoint):
@@ -143,22 +171,26 @@ class OpenAIRESTEndpoint(RESTAPIEndpoint):
         super().__init__()
 
         self._config = config
-        self._headers = {
+        headers = {
             "Content-Type": "application/json",
-            "Authorization": f"Bearer {key}",
+            "Authorization": f"Bearer {config['api_key']}",
         }
         if config['organization'] is not None:
-            self._headers["OpenAI-Organization"] = config['organization']
+            headers["OpenAI-Organization"] = config['organization']
+        self._headers = MappingProxyType(headers)
 
         self._model = model
-        self._completion_url = openai.api_base + openai.api_version + "/completions"
-        self._chat_completion_url = openai.api_base + openai.api_version + "/chat/completions"
-        self._embedding_url = openai.api_base + openai.api_version + "/embeddings"
+        base_url = openai.api_base.rstrip('/')
+        if openai.api_version:
+            base_url = f"{base_url}/{openai.api_version.strip('/')}"
+        self._completion_url = f"{base_url}/completions"
+        self._chat_completion_url = f"{base_url}/chat/completions"
+        self._embedding_url = f"{base_url}/embeddings"
 
     def get_config(self) -> dict[str, str]:
         return self._config
 
-    def get_headers(self) -> dict[str, str]:
+    def get_headers(self) -> Mapping[str, str]:
         return self._headers
 
     def get_completion_url(self) -> str:
@@ -185,7 +217,7 @@ class OpenAIRESTEndpoint(RESTAPIEndpoint):
         }
 
 
-class AzureOpenAIEndpoint(APIEndpoint):
+class AzureOpenAIEndpoint(RESTAPIEndpoint):
     def __init__(
         self,
         deployment_name: str,
@@ -201,10 +233,10 @@ class AzureOpenAIEndpoint(APIEndpoint):
         super().__init__()
 
         self._config = config
-        self._headers = {
+        self._headers = MappingProxyType({
             "Content-Type": "application/json",
             "api-key": self._config['api_key'],
-        }
+        })
 
         self._deployment_name = deployment_name
         self._completion_url = (
@@ -215,7 +247,7 @@ class AzureOpenAIEndpoint(APIEndpoint):
             f"{self._config['api_base']}/openai/deployments/{self._deployment_name}/"
             f"embeddings?api-version={self._config['api_version']}"
         )
-        self.get_chat_completion_url = (
+        self._chat_completion_url = (
             f"{self._config['api_base']}/openai/deployments/{self._deployment_name}/"
             f"chat/completions?api-version={self._config['api_version']}"
         )
@@ -223,7 +255,7 @@ class AzureOpenAIEndpoint(APIEndpoint):
     def get_config(self) -> dict[str, str]:
         return self._config
 
-    def get_headers(self) -> dict[str, str]:
+    def get_headers(self) -> Mapping[str, str]:
         return self._headers
 
     def get_completion_url(self) -> str:
@@ -250,3 +282,15 @@ class AzureOpenAIEndpoint(APIEndpoint):
         }
 
 
+if __name__ == "__main__":
+    # Smoke check: both endpoints can be constructed and build their URLs without touching the network
+    config = openai_params_from_config(None, {
+        'OPENAI_API_KEY': 'sk-test',
+        'OPENAI_API_BASE': 'https://example.openai.azure.com',
+        'OPENAI_API_TYPE': 'azure',
+        'OPENAI_API_VERSION': '2022-12-01',
+    })
+    with OpenAIRESTEndpoint('text-davinci-003', config) as endpoint:
+        print(endpoint.get_completion_url(), dict(endpoint.get_headers()))
+    with AzureOpenAIEndpoint('my-deployment', config) as endpoint:
+        print(endpoint.get_chat_completion_url(), dict(endpoint.get_headers()))
@@ -30,36 +30,43 @@ is to unset the environment variable first.
 
 """
 
+# (config key, openai parameter name) pairs used to translate a config into openai settings
+CONFIG_MAPPING = (
+    ('OPENAI_API_KEY', 'api_key'),
+    ('OPENAI_API_BASE', 'api_base'),
+    ('OPENAI_API_TYPE', 'api_type'),
+    ('OPENAI_API_VERSION', 'api_version'),
+    ('OPENAI_ORGANIZATION', 'organization'),
+)
+
+# openai_config_from_bash results keyed on (path, mtime, size)
+_CFG_CACHE: dict[tuple, dict] = {}
+
+
 def get_openai_env():
     """Scan os.environ for OpenAI environment variables"""
-    config = {}
-    for x in os.environ:
-        if x.startswith('OPENAI_'):
-            config[x] = os.environ[x]
-    return config
+    return {k: v for k, v in os.environ.items() if k.startswith('OPENAI_')}
 
 
 def clean_openai_env():
     """Unset OpenAI environment variables"""
-    config = get_openai_env()
-    for x in config:
-        del os.environ[x]
+    for k in [k for k in os.environ if k.startswith('OPENAI_')]:
+        del os.environ[k]
 
 
 def openai_config_from_bash(bash_script):
     """"""
-    config_mapping = {
-        'OPENAI_API_KEY': 'api_key',
-        'OPENAI_API_BASE': 'api_base',
-        'OPENAI_API_TYPE': 'api_type',
-        'OPENAI_API_VERSION': 'api_version',
-        'OPENAI_ORGANIZATION': 'organization',
-    }
-    envs = bashdict.bash_to_dict(bash_script)
+    return bashdict.cached_by_stat(_CFG_CACHE, bash_script, _params_from_bash).copy()
+
+
+def _params_from_bash(path):
+    """Maps the OpenAI variables exported by a bash script to openai parameter names"""
+    envs = bashdict.parse_bash(path)
     params = { }
-    for config_key, param_key in config_mapping.items():
-        if config_key in envs:
-            params[param_key] = envs[config_key]
+    for config_key, param_key in CONFIG_MAPPING:
+        value = envs.get(config_key)
+        if value is not None:
+            params[param_key] = value
     return params
 
 
@@ -67,17 +74,13 @@ def get_completion_cli(prompt, config=None, **kwargs):
     """
     Get completion from OpenAI API
     """
-    if config:
-        config.update(kwargs)
-    else:
-        config = kwargs
-    if 'debug' in config:
-        del config['debug']
-        print(config)
+    merged = {**(config or {}), **kwargs}
+    if merged.pop('debug', False):
+        print(merged)
 
     response = openai.Completion.create(
         prompt=prompt,
-        **config
+        **merged
     )
     completion = response['choices'][0]['text']
     return completion
@@ -87,17 +90,13 @@ def get_embedding_cli(input, config=None, **kwargs):
     """
     Get embedding from OpenAI API
     """
-    if config:
-        config.update(kwargs)
-    else:
-        config = kwargs
-    if 'debug' in config:
-        del config['debug']
-        print(config)
+    merged = {**(config or {}), **kwargs}
+    if merged.pop('debug', False):
+        print(merged)
 
     response = openai.Embedding.create(
         input=input,
-        **config
+        **merged
     )
     embedding = response['data'][0]['embedding']
     return embedding